@@ -0,0 +1,121 @@
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import os
+import unicodedata
+from collections import defaultdict
+
+import pytest
+
+from torrentmatch.tm import _build_size_index, _grouped_by_folder, get_media_files, is_ignored, scan_media
+
+
+def make_file(path: Path, size: int, content_byte=b"x"):
+    """Create a fake file with a specific size."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content_byte * size)
+    return path
+
+
+def rglob_scan(media_dir: Path):
+    """The original rglob-based folder_stats / media_by_size computation, kept as a reference."""
+    folder_stats = {}
+    for folder in [d for d in media_dir.rglob("*") if d.is_dir()]:
+        total_size = 0
+        file_count = 0
+        for f in folder.rglob("*"):
+            if f.is_file() and not is_ignored(f.name):
+                total_size += f.stat().st_size
+                file_count += 1
+        if file_count > 0:
+            folder_stats[folder] = (total_size, file_count)
+
+    media_by_size = defaultdict(list)
+    for f in media_dir.rglob("*"):
+        if f.is_file() and not is_ignored(f.name):
+            media_by_size[f.stat().st_size].append(f)
+    return folder_stats, media_by_size
+
+
+@pytest.fixture
+def media_tree(tmp_path):
+    """A media folder with nested folders, ignored files, an empty folder, a symlinked file and a symlinked folder."""
+    media = tmp_path / "media"
+    make_file(media / "Movie.mkv", 300)
+    make_file(media / "Show" / "Season 1" / "ep1.mkv", 100)
+    make_file(media / "Show" / "Season 1" / "ep2.mkv", 100)
+    make_file(media / "Show" / "Season 2" / "ep1.mkv", 120)
+    make_file(media / "Show" / "Season 2" / ".DS_Store", 7)
+    make_file(media / "Show" / "cover.jpg@SynoEAStream", 9)
+    make_file(media / "Only Junk" / "Thumbs.db", 5)
+    (media / "Empty").mkdir()
+    make_file(tmp_path / "elsewhere" / "extra.nfo", 42)
+    (media / "Show" / "extra.nfo").symlink_to(tmp_path / "elsewhere" / "extra.nfo")
+    make_file(tmp_path / "ext" / "B" / "b1.mkv", 200)
+    make_file(tmp_path / "ext" / "B" / "Extras" / "b2.mkv", 50)
+    (media / "linkdir").symlink_to(tmp_path / "ext" / "B", target_is_directory=True)
+    return media
+
+
+def test_scan_media_matches_rglob(media_tree):
+    folder_stats, media_by_size = scan_media(media_tree)
+    expected_stats, expected_by_size = rglob_scan(media_tree)
+
+    assert folder_stats == expected_stats
+    assert {k: sorted(v) for k, v in media_by_size.items()} == {
+        k: sorted(v) for k, v in expected_by_size.items()
+    }
+
+    # Spot-check the nested totals directly
+    assert folder_stats[media_tree / "Show"] == (100 + 100 + 120 + 42, 4)
+    assert folder_stats[media_tree / "Show" / "Season 2"] == (120, 1)
+    assert media_tree / "Only Junk" not in folder_stats
+    assert media_tree / "Empty" not in folder_stats
+
+    # A symlinked folder is a candidate itself but isn't descended into
+    assert folder_stats[media_tree / "linkdir"] == (250, 2)
+    assert media_tree / "linkdir" / "Extras" not in folder_stats
+    assert 200 not in media_by_size
+
+
+@pytest.mark.parametrize("as_root", [lambda p: p, str, lambda p: str(p) + os.sep], ids=["path", "str", "str-trailing-sep"])
+def test_get_media_files_relative_paths(media_tree, as_root):
+    make_file(media_tree / unicodedata.normalize("NFD", "Café") / "film.mkv", 10)
+
+    assert get_media_files(as_root(media_tree)) == {
+        Path("Movie.mkv"),
+        Path("Show/Season 1/ep1.mkv"),
+        Path("Show/Season 1/ep2.mkv"),
+        Path("Show/Season 2/ep1.mkv"),
+        Path("Show/extra.nfo"),
+        Path(unicodedata.normalize("NFC", "Café"), "film.mkv"),
+    }
+
+
+def test_build_size_index(media_tree):
+    index = _build_size_index(media_tree / "Show")
+    by_size, by_size_name = index.by_size, index.by_size_name
+
+    assert sorted(by_size[100]) == [
+        media_tree / "Show" / "Season 1" / "ep1.mkv",
+        media_tree / "Show" / "Season 1" / "ep2.mkv",
+    ]
+    assert by_size[42] == [media_tree / "Show" / "extra.nfo"]
+    assert by_size_name[(120, "ep1.mkv")] == media_tree / "Show" / "Season 2" / "ep1.mkv"
+    assert (100, "EP1.MKV") not in by_size_name
+    assert (100, "ep1.mkv") in by_size_name
+
+
+def test_grouped_by_folder():
+    paths = {Path("b/z"), Path("a/sub/x"), Path("a/y"), Path("a/b"), Path("c")}
+    assert list(_grouped_by_folder(paths)) == [
+        Path("c"),
+        Path("a/b"),
+        Path("a/y"),
+        Path("a/sub/x"),
+        Path("b/z"),
+    ]
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from torrentmatch import tm
+
+
+@pytest.fixture(params=["rapidfuzz", "difflib"])
+def backend(request, monkeypatch):
+    """Run each test against both scoring backends."""
+    if request.param == "rapidfuzz":
+        if tm.process is None:
+            pytest.skip("rapidfuzz not installed")
+    else:
+        monkeypatch.setattr(tm, "process", None)
+        monkeypatch.setattr(tm, "fuzz", None)
+    return request.param
+
+
+def test_best_name_match_picks_most_similar(backend):
+    candidates = [Path("a/RANDOM_FILE.VOB"), Path("a/VTS_01_1X.VOB")]
+    best, score = tm._best_name_match("VTS_01_1.VOB", candidates)
+    assert best == Path("a/VTS_01_1X.VOB")
+    assert score > tm.NAME_CUTOFF
+
+
+def test_best_name_match_rejects_score_equal_to_cutoff(backend):
+    # "abcd" vs "abxy": 2 of 4 characters match, so both backends score exactly 0.5
+    assert tm._best_name_match("abcd.mkv", [Path("abxy.mkv")], cutoff=0.5) == (None, 0.0)
+    best, score = tm._best_name_match("abcd.mkv", [Path("abxy.mkv")], cutoff=0.49)
+    assert best == Path("abxy.mkv")
+    assert score == pytest.approx(0.5)
+
+
+def test_best_name_match_rejects_score_equal_to_default_cutoff(backend):
+    # 11 shared characters out of 2 x 20 scores exactly 0.55
+    assert tm._best_name_match("abcdefghijklmnopqrst.mkv", [Path("abcdefghijkuvwxyz123.mkv")]) == (None, 0.0)
+
+
+def test_name_similarity(backend):
+    assert tm.name_similarity("VTS_01_0.BUP", "VTS_01_0.BUP") == 1.0
+    assert tm.name_similarity("VTS_01_0.BUP", "RANDOM_FILE.BUP") < 0.9
+    assert tm.name_similarity("abc.mkv", "xyz.mkv") == 0.0
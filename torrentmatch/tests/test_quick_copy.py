@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import errno
+import os
+
+import pytest
+
+from torrentmatch.tm import quick_copy
+
+
+def make_file(path: Path, size: int):
+    """Create a file of random bytes with a specific size."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = os.urandom(size)
+    path.write_bytes(data)
+    return data
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "in" / "movie.mkv"
+    data = make_file(path, 1024 * 1024)
+    os.utime(path, (1_000_000_000, 1_000_000_000))
+    return path, data
+
+
+def test_quick_copy_copies_contents_and_metadata(src, tmp_path):
+    path, data = src
+    dest = tmp_path / "out" / "nested" / "movie.mkv"
+
+    quick_copy(path, dest)
+
+    assert dest.read_bytes() == data
+    assert dest.stat().st_mtime == path.stat().st_mtime
+
+
+def test_quick_copy_falls_back_when_copy_file_range_fails(src, tmp_path, monkeypatch):
+    path, data = src
+    dest = tmp_path / "out" / "movie.mkv"
+
+    def unsupported(*args, **kwargs):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    quick_copy(path, dest)
+
+    assert dest.read_bytes() == data
+    assert dest.stat().st_mtime == path.stat().st_mtime
+
+
+def test_quick_copy_falls_back_when_copy_file_range_returns_zero(src, tmp_path, monkeypatch):
+    path, data = src
+    dest = tmp_path / "out" / "movie.mkv"
+
+    monkeypatch.setattr(os, "copy_file_range", lambda *args, **kwargs: 0, raising=False)
+    quick_copy(path, dest)
+
+    assert dest.read_bytes() == data
+
+
+def test_quick_copy_reports_short_copy(src, tmp_path, monkeypatch, capsys):
+    path, _ = src
+    dest = tmp_path / "out" / "movie.mkv"
+    calls = []
+
+    def short_copy(in_fd, out_fd, count, *args, **kwargs):
+        # Copy one chunk, then stop as if the filesystem gave up
+        calls.append(count)
+        if len(calls) > 1:
+            return 0
+        return os.write(out_fd, os.read(in_fd, 4096))
+
+    monkeypatch.setattr(os, "copy_file_range", short_copy, raising=False)
+    quick_copy(path, dest)
+
+    assert "quick_copy failed" in capsys.readouterr().out
@@ -2,64 +2,216 @@
 
 import argparse
 import difflib
+import functools
+import os
 import shutil
 import sys
 import unicodedata
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from difflib import SequenceMatcher
+from itertools import chain
 from pathlib import Path
 
 from torrentool.api import Torrent
 from torrentool.torrent import Torrent
 
-ignored = {".DS_Store", "Thumbs.db", "@eaDir", "desktop.ini", "ehthumbs.db", "._.DS_Store"}
-ignored_suffixes = {"@SynoEAStream", "@SynoResource"}
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # optional; fall back to difflib
+    fuzz = process = None
+
+ignored = frozenset({".DS_Store", "Thumbs.db", "@eaDir", "desktop.ini", "ehthumbs.db", "._.DS_Store"})
+ignored_suffixes = ("@SynoEAStream", "@SynoResource")  # tuple so str.endswith can take it directly
+
+NAME_CUTOFF = 0.55  # minimum name similarity for a fuzzy match to be preferred
 
 
 def is_ignored(filename):
+    return filename in ignored or filename.endswith(ignored_suffixes)
 
-    if filename in ignored:
-        return True
-    for suffix in ignored_suffixes:
-        if filename.endswith(suffix):
-            return True
-    return False
+
+@functools.lru_cache(maxsize=None)
+def _nfc(part: str) -> str:
+    """NFC-normalize a single path component (cached; components repeat a lot)."""
+    if part.isascii() or unicodedata.is_normalized("NFC", part):
+        return part
+    return unicodedata.normalize("NFC", part)
 
 
 def normalize_path(path: Path) -> Path:
-    parts = [unicodedata.normalize("NFC", part) for part in path.parts]
-    return Path(*parts)
+    return Path(*map(_nfc, path.parts))
+
+
+def _iter_files(root):
+    """Yield an os.DirEntry for every file under root, including symlinked files.
+    Symlinked directories are not descended into.
+    """
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+        except OSError:
+            continue
+
+
+def scan_media(media_dir: Path):
+    """
+    Walk media_dir once, post-order.
+    Returns (folder_stats, media_by_size):
+        folder_stats:  { <folder Path>: (total_size, file_count) } for every non-empty subfolder
+        media_by_size: { <size>: [<file Path>, ...] }
+    Ignored files are skipped in both.
+    """
+    folder_stats = {}
+    media_by_size = defaultdict(list)
+
+    def _walk(d, record=True):
+        # record=False only totals d; used for symlinked folders, whose contents are not otherwise listed
+        total_size = 0
+        file_count = 0
+        try:
+            with os.scandir(d) as it:
+                entries = list(it)
+        except OSError:
+            return 0, 0
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                size, count = _walk(entry.path, record)
+                if record and count > 0:
+                    folder_stats[Path(entry.path)] = (size, count)
+                total_size += size
+                file_count += count
+            elif entry.is_symlink() and entry.is_dir():
+                # A linked folder is a match candidate in its own right, but (like rglob)
+                # it isn't descended into, so it adds nothing to its parent or media_by_size
+                if record:
+                    size, count = _walk(entry.path, record=False)
+                    if count > 0:
+                        folder_stats[Path(entry.path)] = (size, count)
+            elif entry.is_file() and not is_ignored(entry.name):
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    continue
+                if record:
+                    media_by_size[size].append(Path(entry.path))
+                total_size += size
+                file_count += 1
+        return total_size, file_count
+
+    _walk(media_dir)
+    return folder_stats, media_by_size
+
+
+SizeIndex = namedtuple("SizeIndex", ["by_size", "by_size_name"])
+
+
+def _build_size_index(media_path) -> SizeIndex:
+    """
+    Index the files under media_path. Returns SizeIndex(by_size, by_size_name):
+        by_size:      { <size>: [<file Path>, ...] }
+        by_size_name: { (<size>, <lowercased file name>): <first file Path seen> }
+    """
+    by_size = defaultdict(list)
+    by_size_name = {}
+    for entry in _iter_files(media_path):
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            continue
+        path = Path(entry.path)
+        by_size[size].append(path)
+        by_size_name.setdefault((size, entry.name.lower()), path)
+    return SizeIndex(by_size, by_size_name)
 
 
 def get_torrent_files(torrent_dir: Path) -> list[tuple[Path, Torrent]]:
-    return [(f, Torrent.from_file(f)) for f in torrent_dir.glob("*.torrent*")]
+    paths = []
+    with os.scandir(torrent_dir) as it:
+        for entry in it:
+            if entry.name.endswith((".torrent", ".torrent.added")) and entry.is_file():
+                paths.append(Path(entry.path))
+    if not paths:
+        return []
+    # Loading is mostly disk I/O, so overlap it across threads
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+        return list(zip(paths, ex.map(Torrent.from_file, paths)))
 
 
 def files_in_torrent(torrent: Torrent) -> set[Path]:
-    return {normalize_path(Path(file_path)) for file_path, _ in torrent.files}
+    # Read the decoded metadata directly; torrent.files builds a TorrentFile per entry we don't need
+    info = torrent._struct.get("info")
+    if not info:
+        return set()
+    name = _nfc(info["name"])
+    if "files" in info:
+        return {Path(name, *map(_nfc, f["path"])) for f in info["files"]}
+    return {Path(name)}
 
 
 def get_media_files(media_dir: Path) -> set[Path]:
+    root = os.fspath(media_dir)
+    # entry.path is always root joined with the relative part, so slice instead of Path.relative_to
+    # and build the normalized Path straight from the split parts
+    prefix_len = len(os.path.join(root, ""))
     return {
-        normalize_path(file.relative_to(media_dir))
-        for file in media_dir.rglob("*")
-        if file.is_file()
+        Path(*map(_nfc, entry.path[prefix_len:].split(os.sep)))
+        for entry in _iter_files(root)
+        if not is_ignored(entry.name)
     }
 
 
 def print_results(results):
     """Pretty-print comparison results."""
+    lines = []
     for item in results:
         torrent_name = item["torrent"]
         matches = item["media"]
 
         if not matches:
-            print(f"{torrent_name} | No match found")
+            lines.append(f"{torrent_name} | No match found")
         else:
-            print(f"{torrent_name} | Matches:")
+            lines.append(f"{torrent_name} | Matches:")
             for f in matches:
-                print(f"    -> {f}")
-        print()
+                lines.append(f"    -> {f}")
+        lines.append("")
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _kernel_copy(src, dest):
+    """Copy file contents in-kernel with os.copy_file_range.
+    Returns False if copy_file_range is unavailable or refuses the copy before writing anything,
+    so the caller can fall back to shutil.copy2 (which already uses sendfile on Linux).
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(in_fd).st_size
+        offset = 0
+        while offset < size:
+            try:
+                n = os.copy_file_range(in_fd, out_fd, size - offset)
+            except OSError:
+                # Unsupported here (e.g. EXDEV, ENOSYS); only safe to fall back before any bytes were written
+                if offset:
+                    raise
+                return False
+            if n == 0:
+                # Some filesystems report 0 instead of an error when they can't do the copy
+                if offset:
+                    raise OSError(f"copy_file_range stopped after {offset} of {size} bytes")
+                return False
+            offset += n
+    return True
 
 
 def quick_copy(src, dest,overwrite=True):
@@ -73,30 +225,85 @@ def quick_copy(src, dest,overwrite=True):
 
     #print('quick_copy() src=', src, ' dest=', dest, ' overwrite=', overwrite)
     try:
-        if src.resolve() == dest.resolve():
+        src_stat = os.stat(src)
+        try:
+            dest_stat = os.stat(dest)
+        except FileNotFoundError:
+            dest_stat = None
+
+        if dest_stat is not None and os.path.samestat(src_stat, dest_stat):
             return
 
-        if overwrite and dest.exists() and dest.stat().st_size == src.stat().st_size:
+        if overwrite and dest_stat is not None and dest_stat.st_size == src_stat.st_size:
             pass #print("quick_copy() skipping copy; destination exists with same size.")
             return
-        if not overwrite and dest.exists() and dest.stat().st_size != src.stat().st_size:
+        if not overwrite and dest_stat is not None and dest_stat.st_size != src_stat.st_size:
             dest = dest.with_name(
-                f"{dest.name.removesuffix('.torrent').removesuffix('.added')}_{src.stat().st_size}.torrent"
+                f"{dest.name.removesuffix('.torrent').removesuffix('.added')}_{src_stat.st_size}.torrent"
             )
 
             print("renaming source file as dest exists with different size src.name")
         dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dest)
+        if _kernel_copy(src, dest):
+            shutil.copystat(src, dest)
+        else:
+            shutil.copy2(src, dest)
 
     except Exception as e:
         print(f"quick_copy failed for {src} → {dest}: {e}")
 
 
+@functools.lru_cache(maxsize=8192)
+def _norm_name(name):
+    """Filename as compared by _best_name_match: stem only, lowercased, underscores as spaces."""
+    return Path(name).stem.lower().replace("_", " ")
+
+
+def _best_name_match(name, candidates, cutoff=NAME_CUTOFF):
+    """Return (best candidate Path, score 0–1) for the candidate whose file name is most similar to name.
+    Only scores strictly above cutoff count; returns (None, 0.0) if no candidate qualifies.
+    Uses rapidfuzz when installed, difflib otherwise.
+    """
+    target = _norm_name(name)
+    names = [_norm_name(c.name) for c in candidates]
+    if process is not None:
+        # round() both sides so float noise (e.g. 55.00000000000001) can't decide a tie at the cutoff
+        threshold = round(cutoff * 100, 6)
+        best = process.extractOne(target, names, scorer=fuzz.ratio, score_cutoff=threshold)
+        if best and round(best[1], 6) > threshold:
+            return candidates[best[2]], best[1] / 100.0
+        return None, 0.0
+
+    # seq2 is fixed, so its b2j index is built once for all candidates
+    sm = SequenceMatcher(autojunk=False)
+    sm.set_seq2(target)
+    best, best_score = None, cutoff
+    for candidate, candidate_name in zip(candidates, names):
+        sm.set_seq1(candidate_name)
+        # Both are upper bounds on ratio(), so at or below cutoff the candidate can't qualify
+        if sm.real_quick_ratio() <= cutoff or sm.quick_ratio() <= cutoff:
+            continue
+        r = sm.ratio()
+        if r > best_score:
+            best, best_score = candidate, r
+    return (best, best_score) if best is not None else (None, 0.0)
+
+
 def name_similarity(a, b):
     """Return a similarity ratio (0–1) between two filenames (ignoring case and extensions)."""
-    a = Path(a).stem.lower().replace("_", " ")
-    b = Path(b).stem.lower().replace("_", " ")
-    return SequenceMatcher(None, a, b).ratio()
+    return _best_name_match(a, [Path(b)], cutoff=0.0)[1]
+
+
+def _grouped_by_folder(paths):
+    """Yield paths folder by folder (folders sorted), with each folder's file names sorted.
+    Sorts many small buckets instead of the whole set; files in a folder come before its subfolders.
+    """
+    buckets = defaultdict(list)
+    for p in paths:
+        buckets[p.parent].append(p.name)
+    for parent in sorted(buckets):
+        for name in sorted(buckets[parent]):
+            yield parent / name
 
 
 def report_torrent_media_mismatches(torrent_dir: Path, media_dir: Path):
@@ -112,30 +319,32 @@ def report_torrent_media_mismatches(torrent_dir: Path, media_dir: Path):
     for torrent_path, torrent in torrents:
         files = files_in_torrent(torrent)
         all_torrent_files.update(files)
-        for f in files:
-            if f not in media_files and not is_ignored(f.name):
-                missing_by_torrent[torrent_path.name].append(f)
+        missing = [f for f in files - media_files if not is_ignored(f.name)]
+        if missing:
+            missing_by_torrent[torrent_path.name].extend(missing)
 
+    # Build the whole report first and write it once
+    lines = []
     extra_media_files = media_files - all_torrent_files
     if extra_media_files:
-        print("Files in media directory not in any torrent:")
+        lines.append("Files in media directory not in any torrent:")
         #print('extra_media_files=', extra_media_files, '\n ')
-        for f in sorted(extra_media_files):
-            if not is_ignored(f.name):
-                print(f"  {f}")
+        for f in _grouped_by_folder(extra_media_files):
+            lines.append(f"  {f}")
     else:
-        print("All media files are referenced in torrents.")
-    print()
+        lines.append("All media files are referenced in torrents.")
+    lines.append("")
 
     if missing_by_torrent:
-        print("Files referenced by torrents but missing from media directory:")
+        lines.append("Files referenced by torrents but missing from media directory:")
         for torrent_name, files in sorted(missing_by_torrent.items()):
-            print(f"  {torrent_name}")
-            for f in sorted(files):
-                if not is_ignored(f.name):
-                    print(f"    {f}")
+            lines.append(f"  {torrent_name}")
+            for f in _grouped_by_folder(files):
+                lines.append(f"    {f}")
     else:
-        print("All torrent files are accounted for in media.")
+        lines.append("All torrent files are accounted for in media.")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def compare_torrents_with_media(torrent_dir: Path, media_dir: Path, size_tolerance_bytes=0):
@@ -150,35 +359,11 @@ def compare_torrents_with_media(torrent_dir: Path, media_dir: Path, size_toleran
 
     results = []
 
-    # Precompute media folder statistics
-    folder_stats = {}
-    for folder in [d for d in media_dir.rglob("*") if d.is_dir()]:
-        total_size = 0
-        file_count = 0
-        for f in folder.rglob("*"):
-            if f.is_file() and not is_ignored(f.name):
-                try:
-                    total_size += f.stat().st_size
-                    file_count += 1
-                except (OSError, FileNotFoundError):
-                    continue
-        if file_count > 0:
-            folder_stats[folder] = (total_size, file_count)
+    # Precompute media folder statistics and media file sizes in a single walk
+    folder_stats, media_by_size = scan_media(media_dir)
 
     # print(f"folder_stats={folder_stats}\n")
 
-    # Precompute media file sizes for single-file torrents
-    media_files = [f for f in media_dir.rglob("*") if f.is_file()]
-    media_by_size = defaultdict(list)
-
-    for f in media_files:
-        # print("media_files f==", f)
-        try:
-            if not is_ignored(f.name):
-                media_by_size[f.stat().st_size].append(f)
-        except (OSError, FileNotFoundError):
-            continue
-
     # print(f"media_by_size={media_by_size}\n")
 
     # Main comparison loop
@@ -248,6 +433,8 @@ def collect_torrents_and_media(results, torrents_in, media_in, media_out, torren
     """
     print('results=', results  )
 
+    size_indexes = {}  # media folder -> SizeIndex
+
     for item in results:
         torrent_name = item["torrent"]
         # print(f"\n\nProcessing torrent: {torrent_name}")
@@ -293,48 +480,53 @@ def collect_torrents_and_media(results, torrents_in, media_in, media_out, torren
             # print('dest_dir=', dest_dir)
             # dest_dir.mkdir(parents=True, exist_ok=True)
             # print(f" Found {len(torrent_files)} files in torrent metadata.")
+
+            # Index each matched folder by size once; folders can match more than one torrent
+            for media_path in matches:
+                if media_path not in size_indexes:
+                    size_indexes[media_path] = _build_size_index(media_path)
+
             for tf in torrent_files:
                 tf_length = tf.get("length")
                 tf_path_parts = tf.get("path", [])
                 tf_path = Path(*tf_path_parts)
                 dest_file = dest_dir / tf_path
 
-                # Collect all candidate files of matching size
-                size_matches = []
-                for media_path in matches:
-                    size_matches.extend(
-                        [
-                            lf
-                            for lf in Path(media_path).rglob("*")
-                            if lf.is_file() and lf.stat().st_size == tf_length
-                        ]
+                # Exact (size, name) hit is the common case and needs no candidate list
+                tf_key = (tf_length, tf_path.name.lower())
+                candidate = next(
+                    (c for c in (size_indexes[mp].by_size_name.get(tf_key) for mp in matches) if c is not None),
+                    None,
+                )
+
+                if candidate is None:
+                    # Collect all candidate files of matching size
+                    size_matches = list(
+                        chain.from_iterable(size_indexes[mp].by_size.get(tf_length, ()) for mp in matches)
                     )
 
-                if not size_matches:
-                    print(f"No local file of size {tf_length} found for {tf_path}")
-                    continue
-
-                # Pick best match
-                if len(size_matches) == 1:
-                    candidate = size_matches[0]
-                #   print(f" Unique size match found: {candidate}")
-
-                # Try exact filename match first
-                exact_name_matches = [
-                    lf for lf in size_matches if lf.name.lower() == tf_path.name.lower()
-                ]
-                if exact_name_matches:
-                    candidate = exact_name_matches[0]
-                # print(f" Exact filename match found: {candidate}")
-                else:
-                    # fuzzy match
-                    scores = [(lf, name_similarity(tf_path.name, lf.name)) for lf in size_matches]
-                    scores.sort(key=lambda x: x[1], reverse=True)
-                    best_file, best_score = scores[0]
-                    candidate = best_file if best_score > 0.55 else size_matches[0]
-                    print(
-                        f" Multiple size matches found. Best name match: {candidate} (score={best_score:.2f})"
-                    )
+                    if not size_matches:
+                        print(f"No local file of size {tf_length} found for {tf_path}")
+                        continue
+
+                    # Pick best match
+                    if len(size_matches) == 1:
+                        candidate = size_matches[0]
+                    #   print(f" Unique size match found: {candidate}")
+                    else:
+                        # fuzzy match
+                        best_file, best_score = _best_name_match(tf_path.name, size_matches)
+                        if best_file is not None:
+                            candidate = best_file
+                            print(
+                                f" Multiple size matches found. Best name match: {candidate} (score={best_score:.2f})"
+                            )
+                        else:
+                            candidate = size_matches[0]
+                            print(
+                                f" Multiple size matches found. No name scored above {NAME_CUTOFF}; "
+                                f"falling back to first size match: {candidate}"
+                            )
 
                 # dest_file.parent.mkdir(parents=True, exist_ok=True)
 